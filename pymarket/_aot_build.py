@@ -0,0 +1,31 @@
+import os
+
+from numba.pycc import CC
+
+from pymarket.algorithms import _alg_01_core, _alg_01_source_hash
+
+# ahead-of-time compiled extension for the alg_01 loop, built next to
+# this file with `python -m pymarket._aot_build`. alg_01 only uses it
+# while source_hash matches the current state buffer indices and source
+# of _alg_01_state, _alg_01_step and _alg_01_core, so rebuild after
+# changing any of them. numba.pycc is pending deprecation in numba and
+# warns on import, alg_01 falls back to the jit version without it
+cc = CC('pymarket_core')
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+# stock prices, stock/bond price ratios, stock value, bond value,
+# decrease/sell fractions, monthly additions
+cc.export('alg_01_core',
+          'UniTuple(f8, 2)(f4[:], f4[:], f4[:], f8, f8, f8[:], f8[:], f8[:])'
+          )(_alg_01_core.py_func)
+
+# hash of the loop source this extension was built from, frozen into
+# the extension as a constant
+SOURCE_HASH = _alg_01_source_hash()
+
+@cc.export('source_hash', 'i8()')
+def source_hash():
+    return SOURCE_HASH
+
+if __name__ == "__main__":
+    cc.compile()
@@ -1,4 +1,192 @@
+import hashlib
+import inspect
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import numpy as np
+from numba import njit, prange
+
+# indices into the alg_01 state buffer: stock value, bond value, 
+# current max, current min, current decrease
+SV, BV, MX, MN, CD = 0, 1, 2, 3, 4
+
+# initial alg_01 state buffer
+@njit(cache=True)
+def _alg_01_state(stock, stock_val, bond_val):
+    """
+    Returns the state buffer with stock value, bond value, current 
+    max, current min and current decrease at the earliest price
+    """
+
+    s = stock.size
+    state = np.empty(5, dtype=np.float64)
+    state[SV] = stock_val
+    state[BV] = bond_val
+    state[MX] = stock[s-1]
+    state[MN] = stock[s-1]
+    state[CD] = 0.0
+
+    return state
+
+# max/min tracking and buys for one step of alg_01
+@njit(cache=True)
+def _alg_01_step(state, px, k, decr_perc, sell_perc):
+    """
+    Updates the state buffer for the stock price px, buying stock 
+    with bonds for each decrease fraction passed, and returns the 
+    advanced head index k
+    """
+
+    # branchless max update, min update stays guarded since it 
+    # drives the buys below
+    state[MX] = state[MX] if state[MX] >= px else px
+
+    if px < state[MN]:
+        state[MN] = px
+
+        # if new decrease percentage is the same as head entry 
+        # of input decrease percentages, buy and advance head
+        state[CD] = 1 - state[MN]/state[MX]  # absolute value of percentage change
+        while k < decr_perc.size and state[CD] > decr_perc[k]:
+            sell_value = state[BV] * sell_perc[k]
+            state[BV] -= sell_value
+            state[SV] += sell_value
+            k += 1
+
+    return k
+
+# compiled loop for alg_01
+@njit(cache=True)
+def _alg_01_core(stock, stock_ratio, bond_ratio, stock_val, bond_val, 
+                 decr_perc, sell_perc, addn):
+    """
+    Runs the alg_01 loop over the stock price array and the 
+    precomputed stock/bond price ratios in reverse time order and 
+    returns the final (stock_val, bond_val)
+
+    decr_perc and sell_perc are arrays of fractions rather than 
+    percentages, and are consumed through the head index k. addn 
+    holds the bond addition for each step. Prices and ratios may be 
+    float32, the state buffer is always float64
+    """
+
+    # initialize state buffer and head index into decrease/sell fractions
+    state = _alg_01_state(stock, stock_val, bond_val)
+    k = 0
+
+    # number of steps left once all decrease/sell fractions are used
+    tail = 0
+
+    # loop over stock/bond price arrays, updating values 
+    # keeping track of max and min
+    for i in range(stock.size-2, -1, -1):
+        if k == decr_perc.size:
+            tail = i + 1
+            break
+
+        # stock change, bond change and monthly addition
+        state[SV] *= stock_ratio[i]
+        state[BV] = state[BV] * bond_ratio[i] + addn[i]
+
+        k = _alg_01_step(state, stock[i], k, decr_perc, sell_perc)
+
+    # with no buys left only value changes remain, stock ratios 
+    # telescope to a single price ratio
+    if tail > 0:
+        state[SV] *= stock[0] / stock[tail]
+        for j in range(tail-1, -1, -1):
+            state[BV] = state[BV] * bond_ratio[j] + addn[j]
+
+    return state[SV], state[BV]
+
+# hash of the alg_01 loop source, stored in the ahead-of-time build
+def _alg_01_source_hash():
+    """
+    Returns a 60-bit hash of the state buffer indices and the source 
+    of _alg_01_state, _alg_01_step and _alg_01_core, used to detect 
+    an out of date extension
+    """
+
+    # the indices are compiled into the loop as constants
+    source = repr((SV, BV, MX, MN, CD))
+    source += "".join(inspect.getsource(f.py_func) 
+                      for f in (_alg_01_state, _alg_01_step, _alg_01_core))
+    return int(hashlib.sha256(source.encode()).hexdigest()[:15], 16)
+
+# use the ahead-of-time compiled loop if it has been built from the 
+# current source, see pymarket/_aot_build.py, otherwise the cached jit version
+try:
+    from pymarket.pymarket_core import alg_01_core as _alg_01_run, source_hash
+    if source_hash() != _alg_01_source_hash():
+        _alg_01_run = _alg_01_core
+except ImportError:
+    _alg_01_run = _alg_01_core
+
+# compiled loop for alg_01 over many decrease/sell fraction rows
+@njit(parallel=True, cache=True)
+def _alg_01_batch_core(stock, stock_ratio, bond_ratio, stock_val, bond_val, 
+                       decr_percs, sell_percs, addn):
+    """
+    Runs _alg_01_core once for each row of decr_percs and sell_percs, 
+    spreading the rows over threads, and returns an array of the 
+    final (stock_val, bond_val) for each row
+    """
+
+    n = decr_percs.shape[0]
+    results = np.empty((n, 2), dtype=np.float64)
+    for j in prange(n):
+        sv, bv = _alg_01_core(stock, stock_ratio, bond_ratio, stock_val, bond_val, 
+                              decr_percs[j], sell_percs[j], addn)
+        results[j, 0] = sv
+        results[j, 1] = bv
+
+    return results
+
+# precompute the alg_01 loop inputs from stock/bond price series
+def _alg_01_arrays(stock_series, bond_series, monthly_addn):
+    """
+    Returns the stock prices, the day-over-day stock/bond price 
+    changes and the monthly addition for each step as arrays. 
+    alg_01 and alg_01_batch both prepare their inputs here so they 
+    give the same result for the same percentages
+    """
+
+    # assert stock price data and bond price data are the same length
+    assert(stock_series.size == bond_series.size)
+
+    # price changes are kept in single precision, portfolio 
+    # values are still accumulated in double
+    s_arr = stock_series.to_numpy(dtype=np.float32)
+    b_arr = bond_series.to_numpy(dtype=np.float32)
+    stock_ratio = s_arr[:-1] / s_arr[1:]
+    bond_ratio = b_arr[:-1] / b_arr[1:]
+
+    # monthly additions, made every 25 trading days
+    addn = np.where(np.arange(bond_ratio.size) % 25 == 0, float(monthly_addn), 0.0)
+
+    return s_arr, stock_ratio, bond_ratio, addn
+
+# check alg_01 decrease/sell percentages and convert them to fractions
+def _alg_01_fractions(decr_perc, sell_perc):
+    """
+    Returns decr_perc and sell_perc as float64 arrays of fractions, 
+    either single rows for alg_01 or matrices of rows for alg_01_batch
+    """
+
+    # convert percentages to arrays
+    decr_perc = np.asarray(decr_perc, dtype=np.float64)
+    sell_perc = np.asarray(sell_perc, dtype=np.float64)
+
+    # assert percentages are valid
+    assert np.all((decr_perc > 0) & (decr_perc < 100))
+    assert np.all((sell_perc > 0) & (sell_perc < 100))
+
+    # assert decrease and sell percentages are same size
+    assert(decr_perc.shape == sell_perc.shape)
+
+    # convert percentages to fractions
+    return decr_perc * 0.01, sell_perc * 0.01
+
 
 # algorithm for buying during market crash
 def alg_01(stock_series, bond_series, stock_val, bond_val, 
@@ -49,63 +237,179 @@ def alg_01(stock_series, bond_series, stock_val, bond_val,
 
     """
 
-    # assert percentages are valid
-    assert all([0 < x and x < 100 for x in decr_perc])
-    assert all([0 < x and x < 100 for x in sell_perc])
-
-    # assert decrease and sell percentages are same size
-    assert(len(decr_perc) == len(sell_perc))
-
-    # assert stock price data and bond price data are the same length
-    assert(stock_series.size == bond_series.size)
+    # check percentages and convert them to fractions
+    decr_perc, sell_perc = _alg_01_fractions(decr_perc, sell_perc)
 
-    # convert percentages to floats 
-    decr_perc = [x/ 100 for x in decr_perc] 
-    sell_perc = [x/ 100 for x in sell_perc] 
+    # initialize portfolio value 
+    init_port_val = stock_val + bond_val
 
+    # precompute price changes and monthly additions
+    s_arr, stock_ratio, bond_ratio, addn = _alg_01_arrays(stock_series, bond_series, 
+                                                          monthly_addn)
 
-    # initialize current max, current min, current decrease,
-    # current increase, portfolio value 
-    s = stock_series.size
-    max = stock_series[s-1]
-    min = stock_series[s-1]
-    current_decrease = 0.0
-    init_port_val = stock_val + bond_val
+    # run compiled loop over stock prices and price changes
+    stock_val, bond_val = _alg_01_run(s_arr, stock_ratio, bond_ratio, 
+                                      float(stock_val), float(bond_val), 
+                                      decr_perc, sell_perc, addn)
 
-    # loop over stock/bond price series, updating values 
-    # keeping track of max and min
-    for i in range(s-2, -1, -1):
-        stock_change = stock_series[i]/stock_series[i+1] 
-        stock_val = stock_val * stock_change
-        bond_change = bond_series[i]/bond_series[i+1] 
-        bond_val = bond_val * bond_change
-
-        # monthly addition
-        if i % 25 == 0:
-            bond_val = bond_val + monthly_addn
-
-        if stock_series.iloc[i] > max:
-            max = stock_series.iloc[i]
-
-        if stock_series.iloc[i] < min:
-            min = stock_series.iloc[i]
-
-            # if new decrease percentage is the same as first entry 
-            # of input decrease percentages, buy and remove first entry
-            current_decrease = 1 - min/max  # absolute value of percentage change
-            while current_decrease > decr_perc[0]:
-                sell_value = bond_val * sell_perc[0]
-                bond_val = bond_val - sell_value
-                stock_val = stock_val + sell_value
-                decr_perc.pop(0)
-                sell_perc.pop(0)
-                
     fin_port_val = stock_val + bond_val
     port_change = fin_port_val/init_port_val - 1
 
     return port_change
 
 
+# price series shared by each sweep worker process
+_sweep_series = None
+
+# pool initializer, runs once in each worker process to keep the series
+def _init_sweep(stock_series, bond_series):
+    """
+    Stores the price series sent by run_sweep in the worker process
+    """
+
+    global _sweep_series
+    _sweep_series = (stock_series, bond_series)
+
+# single sweep run in a worker process, reads the series sent once by 
+# the pool initializer
+def _sweep_task(stock_val, bond_val, decr_perc, sell_perc, monthly_addn):
+    """
+    Runs alg_01 on the worker's stored price series and returns 
+    its port_change
+    """
+
+    stock_series, bond_series = _sweep_series
+    return alg_01(stock_series, bond_series, stock_val, bond_val, 
+                  decr_perc, sell_perc, monthly_addn)
+
+# run alg_01 over a grid of decrease/sell percentages in parallel
+def run_sweep(stock_series, bond_series, stock_val, bond_val, 
+              param_grid, monthly_addn, max_workers=None):
+    """
+    Runs alg_01 once for each (decr_perc, sell_perc) pair in 
+    param_grid, spreading the runs over a pool of worker processes. 
+    The price series are sent to each worker once when it starts 
+    rather than with every run
+
+    Parameters
+    ----------
+
+    stock_series : pandas.core.series.Series
+        A series of stock price data 
+
+    bond_series : pandas.core.series.Series
+        A series of bond price data 
+
+    stock_val : float
+        the current value of stock assets
+
+    bond_val : float
+        the current value of bond assets
+
+    param_grid : list
+        A list of (decr_perc, sell_perc) pairs, each as 
+        described in alg_01
+
+    monthly_addn : float
+        A monthly addition of captial to be added to 
+        bond_value every 25 trading days
+
+    max_workers : int
+        The number of worker processes, defaults to the 
+        number of cpus
+
+    Returns
+    -------
+
+    port_changes : list
+        The port_change returned by alg_01 for each entry 
+        of param_grid, in the same order
+
+    """
+
+    if max_workers is None:
+        max_workers = os.cpu_count()
+
+    port_changes = [None] * len(param_grid)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_sweep, 
+                             initargs=(stock_series, bond_series)) as executor:
+        futures = {executor.submit(_sweep_task, stock_val, bond_val, 
+                                   decr_perc, sell_perc, monthly_addn): j 
+                   for j, (decr_perc, sell_perc) in enumerate(param_grid)}
+        for future in as_completed(futures):
+            port_changes[futures[future]] = future.result()
+
+    return port_changes
+
+# run alg_01 over a matrix of decrease/sell percentages in one process
+def alg_01_batch(stock_series, bond_series, stock_val, bond_val, 
+                 param_matrix, monthly_addn):
+    """
+    Runs alg_01 once for each row of param_matrix. The price series 
+    are converted once and shared by every run, and the runs are 
+    spread over threads in a single compiled loop
+
+    Parameters
+    ----------
+
+    stock_series : pandas.core.series.Series
+        A series of stock price data 
+
+    bond_series : pandas.core.series.Series
+        A series of bond price data 
+
+    stock_val : float
+        the current value of stock assets
+
+    bond_val : float
+        the current value of bond assets
+
+    param_matrix : numpy.ndarray
+        An array of shape (n, 2k), each row holding k decrease 
+        percentages followed by the k corresponding sell 
+        percentages, as described for decr_perc and sell_perc 
+        in alg_01
+
+    monthly_addn : float
+        A monthly addition of captial to be added to 
+        bond_value every 25 trading days
+
+    Returns
+    -------
+
+    port_changes : numpy.ndarray
+        The port_change of alg_01 for each row of param_matrix
+
+    """
+
+    # convert percentages to array
+    param_matrix = np.asarray(param_matrix, dtype=np.float64)
+
+    # assert rows split evenly into decrease and sell percentages
+    assert(param_matrix.ndim == 2 and param_matrix.shape[1] % 2 == 0)
+
+    # split rows, check percentages and convert them to fractions
+    k = param_matrix.shape[1] // 2
+    decr_percs, sell_percs = _alg_01_fractions(param_matrix[:, :k], param_matrix[:, k:])
+
+    # initialize portfolio value 
+    init_port_val = stock_val + bond_val
+
+    # precompute price changes and monthly additions
+    s_arr, stock_ratio, bond_ratio, addn = _alg_01_arrays(stock_series, bond_series, 
+                                                          monthly_addn)
+
+    # run compiled loop over every row
+    results = _alg_01_batch_core(s_arr, stock_ratio, bond_ratio, 
+                                 float(stock_val), float(bond_val), 
+                                 decr_percs, sell_percs, addn)
+
+    fin_port_vals = results[:, 0] + results[:, 1]
+    port_changes = fin_port_vals/init_port_val - 1
+
+    return port_changes
+
+
 
 
 
@@ -170,40 +474,46 @@ def alg_02(series, margin_rate, margin, decrease_percentages,
         the given period of time using this algorithm
 
     """
-    # assert percentages are valid
-    assert all([0 < x and x < 100 for x in decrease_percentages])
-    assert all([0 < x and x < 100 for x in decrease_buys])
-    assert all([0 < x and x < 100 for x in increase_percentages])
-    assert all([0 < x and x < 100 for x in increase_sells])
+    # convert lists to arrays, decrease percentages are consumed through a head index
+    decrease_percentages = np.asarray(decrease_percentages, dtype=np.float64)
+    decrease_buys = np.asarray(decrease_buys, dtype=np.float64)
+    increase_percentages = np.asarray(increase_percentages, dtype=np.float64)
+    increase_sells = np.asarray(increase_sells, dtype=np.float64)
 
-    # copy lists to not change originals
-    decrease_percentages = decrease_percentages.copy()
-    increase_percentages = increase_percentages.copy()
+    # assert percentages are valid
+    assert np.all((decrease_percentages > 0) & (decrease_percentages < 100))
+    assert np.all((decrease_buys > 0) & (decrease_buys < 100))
+    assert np.all((increase_percentages > 0) & (increase_percentages < 100))
+    assert np.all((increase_sells > 0) & (increase_sells < 100))
 
     # initialize current max, current min, current decrease,
-    # current increase, margin-stock value 
-    s = series.size
-    max = series[s-1]
-    min = series[s-1]
+    # current increase, margin-stock value, head index, prices 
+    # as python floats since this loop runs in the interpreter
+    prices = series.to_numpy(dtype=np.float64).tolist()
+    s = len(prices)
+    max = prices[s-1]
+    min = prices[s-1]
     current_decrease = 0.0
     current_increase = 0.0
     m_stock_val = 0.0
+    k_decr = 0
 
     # loop over series, keeping track of max and min
     for i in range(s-2, -1, -1):
-        if series.iloc[i] > max:
-            max = series.iloc[i]
+        px = prices[i]
+        max = max if max >= px else px
 
-        if series.iloc[i] < min:
-            min = series.iloc[i]
+        if px < min:
+            min = px
 
-            # if new decrease percentage is the same as first entry 
-            # of input decrease percentages, buy and remove first entry
+            # if new decrease percentage is the same as head entry 
+            # of input decrease percentages, buy and advance head
             current_decrease = (max - min) / max  # absolute value of percentage change
-            while current_decrease > decrease_percentages[0]:
+            while (k_decr < decrease_percentages.size 
+                   and current_decrease > decrease_percentages[k_decr]):
                 m_stock_val = m_stock_val + decrease_buys[0] * margin / 100.0
                 margin = margin - m_stock_val
-                decrease_percentages.pop(0)
+                k_decr += 1
 
                 # update money owed
 
@@ -1,10 +1,13 @@
+from itertools import islice
+
 import requests
+import requests_cache
 import json
-import numpy as np
+import orjson
 import pandas as pd
 
 class Connection:
-    def __init__(self, api_key):
+    def __init__(self, api_key, cache=True):
         """
         A class to handle connections to the alphavantage api
 
@@ -14,6 +17,14 @@ class Connection:
             endpoint for api
         api_key : str
             api key 
+        session : requests.Session
+            session that keeps the connection to the api alive 
+            between requests, a requests_cache.CachedSession that 
+            caches api responses on disk for a day if cache is True, 
+            only responses holding time series data are cached so 
+            throttled or rejected requests are fetched again, the 
+            cache lives in the user cache directory and does not 
+            store the api key
 
 
         Methods
@@ -25,6 +36,13 @@ class Connection:
         """
         self.api_endpoint = "https://www.alphavantage.co/query"
         self.api_key = api_key
+        if cache:
+            self.session = requests_cache.CachedSession(
+                'alphavantage_cache', use_cache_dir=True, expire_after=86400, 
+                ignored_parameters=['apikey'], 
+                filter_fn=lambda r: b'Time Series (Daily)' in r.content)
+        else:
+            self.session = requests.Session()
 
         return
 
@@ -45,7 +63,7 @@ class Connection:
         """
         api_params = {'function':'TIME_SERIES_DAILY_ADJUSTED', 'symbol':ticker, 
                    'outputsize':'full', 'apikey':self.api_key}
-        response = requests.get(self.api_endpoint, params=api_params)
+        response = self.session.get(self.api_endpoint, params=api_params)
 
         return response
 
@@ -78,24 +96,25 @@ class Connection:
 
         # get response and json data 
         response = self.get_response(ticker)
-        json_data = response.json()
+        json_data = orjson.loads(response.content)
 
-        # get dates and closing prices from json data
-        dates = [date for date in json_data['Time Series (Daily)'].keys()]
-        prices = [json_data['Time Series (Daily)'][date]['4. close'] for date in dates]
+        # get daily data from json data
+        daily = json_data['Time Series (Daily)']
 
         # assert length is not more than available history
-        assert(length <= len(dates))
+        assert(length <= len(daily))
 
-        # convert date and closing prices to date-index and float types respectively
-        date = pd.DatetimeIndex(dates)
-        price = np.array(prices, dtype='float64')
+        # cut daily data to length, most recent first
+        items = list(islice(daily.items(), length))
 
-        # create pd.Series
-        series = pd.Series(data=price, index=date) 
+        # get dates and closing prices of the kept entries, plain lists are 
+        # several times faster here than DataFrame.from_dict, which builds 
+        # every column of the daily data only to keep the close
+        dates = [date for date, day in items]
+        prices = [day['4. close'] for date, day in items]
 
-        # cut series to length
-        series = series[0:length]
+        # convert closing prices and dates to float and date-index types respectively
+        series = pd.Series(prices, index=pd.DatetimeIndex(dates)).astype('float32')
 
         return series
         
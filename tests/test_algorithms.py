@@ -0,0 +1,150 @@
+import importlib.util
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pymarket import algorithms
+
+
+# original alg_01 loop in double precision, with a bounds guard so it
+# stops buying once every decrease percentage has been used
+def baseline_alg_01(stock_series, bond_series, stock_val, bond_val,
+                    decr_perc, sell_perc, monthly_addn):
+    stock = stock_series.to_numpy(dtype=np.float64)
+    bond = bond_series.to_numpy(dtype=np.float64)
+    decr_perc = [x / 100 for x in decr_perc]
+    sell_perc = [x / 100 for x in sell_perc]
+
+    s = stock.size
+    max = stock[s-1]
+    min = stock[s-1]
+    init_port_val = stock_val + bond_val
+
+    for i in range(s-2, -1, -1):
+        stock_val = stock_val * stock[i] / stock[i+1]
+        bond_val = bond_val * bond[i] / bond[i+1]
+
+        if i % 25 == 0:
+            bond_val = bond_val + monthly_addn
+
+        if stock[i] > max:
+            max = stock[i]
+
+        if stock[i] < min:
+            min = stock[i]
+            current_decrease = 1 - min / max
+            while decr_perc and current_decrease > decr_perc[0]:
+                sell_value = bond_val * sell_perc[0]
+                bond_val = bond_val - sell_value
+                stock_val = stock_val + sell_value
+                decr_perc.pop(0)
+                sell_perc.pop(0)
+
+    return (stock_val + bond_val) / init_port_val - 1
+
+
+N = 3000
+
+# decrease/sell percentages: a few buys, none, and enough to use up
+# every threshold on a volatile series
+PARAMS = [
+    ([5, 10], [20, 30]),
+    ([], []),
+    ([50], [10]),
+    ([5, 10, 20, 30, 40, 50, 60, 70, 80, 90, 95, 99], [10] * 12),
+]
+
+
+def make_series(prices):
+    index = pd.bdate_range('2000-01-03', periods=prices.size)[::-1]
+    return pd.Series(prices, index=index)
+
+
+@pytest.fixture(scope='module')
+def stock_series():
+    rng = np.random.default_rng(0)
+    return make_series(100 * np.exp(np.cumsum(rng.normal(0, 0.02, N))))
+
+
+@pytest.fixture(scope='module', params=['random', 'geometric', 'constant'])
+def bond_series(request):
+    rng = np.random.default_rng(1)
+    if request.param == 'random':
+        prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, N)))
+    elif request.param == 'geometric':
+        prices = 100 * 1.0001 ** np.arange(N)[::-1]
+    else:
+        prices = np.full(N, 50.0)
+    return make_series(prices)
+
+
+@pytest.mark.parametrize('decr_perc, sell_perc', PARAMS)
+def test_alg_01_matches_baseline(stock_series, bond_series, decr_perc, sell_perc):
+    expected = baseline_alg_01(stock_series, bond_series, 1000.0, 500.0,
+                               decr_perc, sell_perc, 10.0)
+    result = algorithms.alg_01(stock_series, bond_series, 1000.0, 500.0,
+                               decr_perc, sell_perc, 10.0)
+    assert result == pytest.approx(expected, abs=1e-4)
+
+
+def test_alg_01_does_not_change_inputs(stock_series, bond_series):
+    decr_perc, sell_perc = [5, 10], [20, 30]
+    algorithms.alg_01(stock_series, bond_series, 1000.0, 500.0,
+                      decr_perc, sell_perc, 10.0)
+    assert decr_perc == [5, 10] and sell_perc == [20, 30]
+
+
+def test_alg_01_batch_matches_alg_01(stock_series, bond_series):
+    param_matrix = np.array([[5, 10, 20, 30],
+                             [10, 20, 50, 50],
+                             [30, 60, 10, 10]], dtype=np.float64)
+    result = algorithms.alg_01_batch(stock_series, bond_series, 1000.0, 500.0,
+                                     param_matrix, 10.0)
+
+    for row, port_change in zip(param_matrix, result):
+        expected = algorithms.alg_01(stock_series, bond_series, 1000.0, 500.0,
+                                     row[:2], row[2:], 10.0)
+        assert port_change == expected
+        assert port_change == pytest.approx(
+            baseline_alg_01(stock_series, bond_series, 1000.0, 500.0,
+                            row[:2], row[2:], 10.0), abs=1e-4)
+
+
+@pytest.fixture(scope='module')
+def aot_module(tmp_path_factory):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        try:
+            from pymarket import _aot_build
+        except ImportError:
+            pytest.skip('numba.pycc is not available')
+
+    output_dir = tmp_path_factory.mktemp('aot')
+    _aot_build.cc.output_dir = str(output_dir)
+    try:
+        _aot_build.cc.compile()
+    except Exception as e:
+        pytest.skip('ahead-of-time build failed: %s' % e)
+
+    path = next(output_dir.glob('pymarket_core*'))
+    spec = importlib.util.spec_from_file_location('pymarket_core', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_aot_source_hash_matches(aot_module):
+    assert aot_module.source_hash() == algorithms._alg_01_source_hash()
+
+
+@pytest.mark.parametrize('decr_perc, sell_perc', PARAMS)
+def test_alg_01_aot_matches_baseline(aot_module, monkeypatch, stock_series,
+                                     bond_series, decr_perc, sell_perc):
+    monkeypatch.setattr(algorithms, '_alg_01_run', aot_module.alg_01_core)
+    expected = baseline_alg_01(stock_series, bond_series, 1000.0, 500.0,
+                               decr_perc, sell_perc, 10.0)
+    result = algorithms.alg_01(stock_series, bond_series, 1000.0, 500.0,
+                               decr_perc, sell_perc, 10.0)
+    assert result == pytest.approx(expected, abs=1e-4)